@@ -1,13 +1,17 @@
 import os
+import json
 import logging
+import orjson
+import redis
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text, Text
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 class Base(DeclarativeBase):
     pass
@@ -29,6 +33,31 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 # Initialize the app with the extension
 db.init_app(app)
 
+# Redis cache for Oracle metadata lookups and dashboard counters. Short
+# timeouts so an unreachable Redis falls back to the database quickly.
+redis_client = redis.Redis.from_url(
+    os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
+    socket_connect_timeout=0.5,
+    socket_timeout=0.5
+)
+
+# Redis keys caching the dashboard counters
+ORACLE_COUNT_KEY = 'dash:ora'
+ES_COUNT_KEY = 'dash:es'
+MAPPING_COUNT_KEY = 'dash:map'
+DASHBOARD_COUNT_TTL = 30
+
+def invalidate_dashboard_count(key):
+    """Drop a cached dashboard counter after its model changes"""
+    try:
+        redis_client.delete(key)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to invalidate dashboard count {key}: {str(e)}")
+
+def json_response(payload):
+    """JSON response encoded with orjson; model datetimes are naive UTC and get a +00:00 offset"""
+    return app.response_class(orjson.dumps(payload, option=orjson.OPT_NAIVE_UTC), mimetype='application/json')
+
 # Register blueprints
 from routes.main import main_bp
 from routes.oracle import oracle_bp
@@ -69,3 +98,28 @@ with app.app_context():
                 'ALTER TABLE mapping_configurations ADD COLUMN last_sync_time DATETIME'
             )
 
+    # JSON columns still stored as text: replace values that are not valid
+    # JSON (as the old get_* wrappers did when reading), then convert the
+    # column to native JSONB on PostgreSQL
+    col_types = {c['name']: c['type'] for c in inspector.get_columns('mapping_configurations')}
+    for name, fallback in (('field_mappings', '[]'), ('transformation_rules', None)):
+        if not isinstance(col_types.get(name), Text):
+            continue
+        with db.engine.begin() as conn:
+            rows = conn.exec_driver_sql(
+                f'SELECT id, {name} FROM mapping_configurations WHERE {name} IS NOT NULL'
+            ).fetchall()
+            for row_id, value in rows:
+                try:
+                    json.loads(value)
+                except (TypeError, ValueError):
+                    conn.execute(
+                        text(f'UPDATE mapping_configurations SET {name} = :value WHERE id = :id'),
+                        {'value': fallback, 'id': row_id}
+                    )
+            if db.engine.dialect.name == 'postgresql':
+                conn.exec_driver_sql(
+                    f'ALTER TABLE mapping_configurations ALTER COLUMN {name} '
+                    f'TYPE JSONB USING {name}::jsonb'
+                )
+
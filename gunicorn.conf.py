@@ -0,0 +1,37 @@
+import logging
+import os
+
+# Gunicorn configuration: gunicorn -c gunicorn.conf.py main:app
+#
+# Requests spend most of their time waiting on Oracle and Elasticsearch, so
+# run gevent workers instead of the default sync worker. The gevent worker
+# monkey-patches the standard library before the app is imported, which
+# makes oracledb cooperative as long as it stays in thin mode (the default;
+# do not call oracledb.init_oracle_client(), thick mode blocks in OCI).
+# Do not enable preload_app, or the app would be imported before patching.
+#
+# Limitations under gevent:
+# - psycopg2 (PostgreSQL metadata database) is a C driver and blocks the
+#   whole worker on every query unless psycogreen is installed; post_fork
+#   below applies its patch when available. SQLite also blocks, briefly.
+# - MigrationService threads become greenlets in the same worker, so a
+#   running migration's database commits and _transform_batch CPU work
+#   stall request handling in that worker. Run long migrations with more
+#   workers, or switch worker_class back to "sync" if that is not acceptable.
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+worker_class = "gevent"
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "500"))
+
+
+def post_fork(server, worker):
+    """Make psycopg2 yield to gevent when psycogreen is installed"""
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        logging.getLogger(__name__).warning(
+            "psycogreen not installed; PostgreSQL queries will block gevent workers"
+        )
+        return
+    patch_psycopg()
@@ -1,6 +1,6 @@
 from app import db
 from datetime import datetime
-import json
+from sqlalchemy.dialects.postgresql import JSONB
 
 class OracleConnection(db.Model):
     __tablename__ = 'oracle_connections'
@@ -38,8 +38,8 @@ class MappingConfiguration(db.Model):
     elasticsearch_connection_id = db.Column(db.Integer, db.ForeignKey('elasticsearch_connections.id'), nullable=False)
     oracle_query = db.Column(db.Text, nullable=False)
     elasticsearch_index = db.Column(db.String(255), nullable=False)
-    field_mappings = db.Column(db.Text, nullable=False)  # JSON string
-    transformation_rules = db.Column(db.Text)  # JSON string
+    field_mappings = db.Column(db.JSON().with_variant(JSONB, 'postgresql'), nullable=False)
+    transformation_rules = db.Column(db.JSON().with_variant(JSONB, 'postgresql'))
 
 
 
@@ -53,31 +53,13 @@ class MappingConfiguration(db.Model):
     # Relationships
     oracle_connection = db.relationship('OracleConnection', backref='mappings')
     elasticsearch_connection = db.relationship('ElasticsearchConnection', backref='mappings')
-    
-    def get_field_mappings(self):
-        try:
-            return json.loads(self.field_mappings) if self.field_mappings else []
-        except:
-            return []
-    
-    def set_field_mappings(self, mappings):
-        self.field_mappings = json.dumps(mappings)
-    
-    def get_transformation_rules(self):
-        try:
-            return json.loads(self.transformation_rules) if self.transformation_rules else []
-        except:
-            return []
-    
-    def set_transformation_rules(self, rules):
-        self.transformation_rules = json.dumps(rules)
 
 class MigrationJob(db.Model):
     __tablename__ = 'migration_jobs'
     
     id = db.Column(db.Integer, primary_key=True)
     mapping_configuration_id = db.Column(db.Integer, db.ForeignKey('mapping_configurations.id'), nullable=False)
-    status = db.Column(db.String(50), nullable=False, default='pending')  # pending, running, completed, failed
+    status = db.Column(db.String(50), nullable=False, default='pending')  # pending, running, stopping, stopped, completed, failed
     total_records = db.Column(db.Integer, default=0)
     processed_records = db.Column(db.Integer, default=0)
     failed_records = db.Column(db.Integer, default=0)
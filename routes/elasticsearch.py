@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import ElasticsearchConnection
 from services.elasticsearch_service import ElasticsearchService
-from app import db
+from app import db, json_response, invalidate_dashboard_count, ES_COUNT_KEY
 import logging
 
 elasticsearch_bp = Blueprint('elasticsearch', __name__)
@@ -12,7 +12,7 @@ def get_connections():
     """Get all Elasticsearch connections"""
     try:
         connections = ElasticsearchConnection.query.filter_by(is_active=True).all()
-        return jsonify([{
+        return json_response([{
             'id': conn.id,
             'name': conn.name,
             'environment': conn.environment,
@@ -20,7 +20,7 @@ def get_connections():
             'port': conn.port,
             'username': conn.username,
             'use_ssl': conn.use_ssl,
-            'created_at': conn.created_at.isoformat()
+            'created_at': conn.created_at
         } for conn in connections])
     except Exception as e:
         logger.error(f"Error fetching Elasticsearch connections: {str(e)}")
@@ -42,6 +42,7 @@ def create_connection():
         )
         db.session.add(connection)
         db.session.commit()
+        invalidate_dashboard_count(ES_COUNT_KEY)
         
         return jsonify({'id': connection.id, 'message': 'Connection created successfully'})
     except Exception as e:
@@ -1,15 +1,49 @@
 from flask import Blueprint, render_template, request, jsonify
+from sqlalchemy import select, func
 from models import OracleConnection, ElasticsearchConnection, MappingConfiguration
-from app import db
+from app import (
+    db, redis_client, ORACLE_COUNT_KEY, ES_COUNT_KEY, MAPPING_COUNT_KEY, DASHBOARD_COUNT_TTL
+)
+import logging
+import redis
 
 main_bp = Blueprint('main', __name__)
+logger = logging.getLogger(__name__)
+
+def _active_count(model):
+    """Scalar subquery counting active rows of a model"""
+    return select(func.count()).select_from(model).where(model.is_active == True).scalar_subquery()
+
+def _dashboard_counts():
+    """Active connection/mapping counts, cached in Redis for DASHBOARD_COUNT_TTL seconds"""
+    keys = (ORACLE_COUNT_KEY, ES_COUNT_KEY, MAPPING_COUNT_KEY)
+    try:
+        cached = redis_client.mget(keys)
+        if None not in cached:
+            return tuple(int(count) for count in cached)
+    except redis.RedisError as e:
+        logger.warning(f"Redis unavailable, skipping dashboard cache: {str(e)}")
+    
+    # Fetch all three counts in a single roundtrip
+    counts = tuple(db.session.execute(select(
+        _active_count(OracleConnection),
+        _active_count(ElasticsearchConnection),
+        _active_count(MappingConfiguration)
+    )).one())
+    
+    try:
+        pipe = redis_client.pipeline()
+        for key, count in zip(keys, counts):
+            pipe.setex(key, DASHBOARD_COUNT_TTL, count)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Redis unavailable, skipping dashboard cache: {str(e)}")
+    return counts
 
 @main_bp.route('/')
 def index():
     """Main dashboard showing overview of connections and mappings"""
-    oracle_connections = OracleConnection.query.filter_by(is_active=True).count()
-    es_connections = ElasticsearchConnection.query.filter_by(is_active=True).count()
-    mappings = MappingConfiguration.query.filter_by(is_active=True).count()
+    oracle_connections, es_connections, mappings = _dashboard_counts()
     
     return render_template('index.html', 
                          oracle_connections=oracle_connections,
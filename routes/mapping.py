@@ -1,28 +1,37 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import joinedload, raiseload
 from models import MappingConfiguration, OracleConnection, ElasticsearchConnection
 from services.mapping_service import MappingService
-from app import db
+from app import db, json_response, invalidate_dashboard_count, MAPPING_COUNT_KEY
 import logging
 
 mapping_bp = Blueprint('mapping', __name__)
 logger = logging.getLogger(__name__)
 
+# The configuration list joins both connections up front; raiseload('*')
+# makes touching any other relationship there an error rather than an N+1.
+
 @mapping_bp.route('/configurations', methods=['GET'])
 def get_configurations():
     """Get all mapping configurations"""
     try:
-        configs = MappingConfiguration.query.filter_by(is_active=True).all()
-        return jsonify([{
+        configs = MappingConfiguration.query.options(
+            joinedload(MappingConfiguration.oracle_connection),
+            joinedload(MappingConfiguration.elasticsearch_connection),
+            raiseload('*')
+        ).filter_by(is_active=True).all()
+        payload = [{
             'id': config.id,
             'name': config.name,
             'oracle_connection': config.oracle_connection.name,
             'elasticsearch_connection': config.elasticsearch_connection.name,
             'elasticsearch_index': config.elasticsearch_index,
             'incremental_column': config.incremental_column,
-            'last_sync_time': config.last_sync_time.isoformat() if config.last_sync_time else None,
-            'created_at': config.created_at.isoformat(),
-            'updated_at': config.updated_at.isoformat()
-        } for config in configs])
+            'last_sync_time': config.last_sync_time,
+            'created_at': config.created_at,
+            'updated_at': config.updated_at
+        } for config in configs]
+        return json_response(payload)
     except Exception as e:
         logger.error(f"Error fetching mapping configurations: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -38,13 +47,14 @@ def create_configuration():
             elasticsearch_connection_id=data['elasticsearch_connection_id'],
             oracle_query=data['oracle_query'],
             elasticsearch_index=data['elasticsearch_index'],
-            incremental_column=data.get('incremental_column')
+            incremental_column=data.get('incremental_column'),
+            field_mappings=data.get('field_mappings', []),
+            transformation_rules=data.get('transformation_rules', [])
         )
-        config.set_field_mappings(data.get('field_mappings', []))
-        config.set_transformation_rules(data.get('transformation_rules', []))
         
         db.session.add(config)
         db.session.commit()
+        invalidate_dashboard_count(MAPPING_COUNT_KEY)
         
         return jsonify({'id': config.id, 'message': 'Configuration created successfully'})
     except Exception as e:
@@ -57,7 +67,7 @@ def get_configuration(config_id):
     """Get a specific mapping configuration"""
     try:
         config = MappingConfiguration.query.get_or_404(config_id)
-        return jsonify({
+        return json_response({
             'id': config.id,
             'name': config.name,
             'oracle_connection_id': config.oracle_connection_id,
@@ -65,11 +75,11 @@ def get_configuration(config_id):
             'oracle_query': config.oracle_query,
             'elasticsearch_index': config.elasticsearch_index,
             'incremental_column': config.incremental_column,
-            'last_sync_time': config.last_sync_time.isoformat() if config.last_sync_time else None,
-            'field_mappings': config.get_field_mappings(),
-            'transformation_rules': config.get_transformation_rules(),
-            'created_at': config.created_at.isoformat(),
-            'updated_at': config.updated_at.isoformat()
+            'last_sync_time': config.last_sync_time,
+            'field_mappings': config.field_mappings or [],
+            'transformation_rules': config.transformation_rules or [],
+            'created_at': config.created_at,
+            'updated_at': config.updated_at
         })
     except Exception as e:
         logger.error(f"Error fetching mapping configuration: {str(e)}")
@@ -89,9 +99,9 @@ def update_configuration(config_id):
             config.incremental_column = data['incremental_column']
 
         if 'field_mappings' in data:
-            config.set_field_mappings(data['field_mappings'])
+            config.field_mappings = data['field_mappings']
         if 'transformation_rules' in data:
-            config.set_transformation_rules(data['transformation_rules'])
+            config.transformation_rules = data['transformation_rules']
         
         db.session.commit()
         return jsonify({'message': 'Configuration updated successfully'})
@@ -114,7 +124,10 @@ def auto_suggest_mapping():
         es_conn = ElasticsearchConnection.query.get_or_404(elasticsearch_connection_id)
         
         mapping_service = MappingService(oracle_conn, es_conn)
-        suggestions = mapping_service.generate_auto_mapping(oracle_query, elasticsearch_index)
+        try:
+            suggestions = mapping_service.generate_auto_mapping(oracle_query, elasticsearch_index)
+        finally:
+            mapping_service.close()
         
         return jsonify(suggestions)
     except Exception as e:
@@ -150,11 +163,11 @@ def export_configuration(config_id):
             'name': config.name,
             'oracle_query': config.oracle_query,
             'elasticsearch_index': config.elasticsearch_index,
-            'field_mappings': config.get_field_mappings(),
-            'transformation_rules': config.get_transformation_rules(),
-            'exported_at': config.updated_at.isoformat()
+            'field_mappings': config.field_mappings or [],
+            'transformation_rules': config.transformation_rules or [],
+            'exported_at': config.updated_at
         }
-        return jsonify(export_data)
+        return json_response(export_data)
     except Exception as e:
         logger.error(f"Error exporting configuration: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -170,13 +183,14 @@ def import_configuration():
             oracle_connection_id=data['oracle_connection_id'],
             elasticsearch_connection_id=data['elasticsearch_connection_id'],
             oracle_query=data['oracle_query'],
-            elasticsearch_index=data['elasticsearch_index']
+            elasticsearch_index=data['elasticsearch_index'],
+            field_mappings=data.get('field_mappings', []),
+            transformation_rules=data.get('transformation_rules', [])
         )
-        config.set_field_mappings(data.get('field_mappings', []))
-        config.set_transformation_rules(data.get('transformation_rules', []))
         
         db.session.add(config)
         db.session.commit()
+        invalidate_dashboard_count(MAPPING_COUNT_KEY)
         
         return jsonify({'id': config.id, 'message': 'Configuration imported successfully'})
     except Exception as e:
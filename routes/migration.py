@@ -1,55 +1,50 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, raiseload
 from models import MigrationJob, MappingConfiguration, MigrationBatch
 from services.migration_service import MigrationService
 from app import db
 import logging
-from app import app
+from app import app, json_response
 migration_bp = Blueprint('migration', __name__)
 logger = logging.getLogger(__name__)
 
+# Shared across requests; job running/stop state is kept on the MigrationJob
+# row, so it holds no per-process job state
+migration_service = MigrationService(app)
+
+def _serialize_job(job):
+    """Serialize a migration job for json_response; expects mapping_configuration to be loaded"""
+    return {
+        'id': job.id,
+        'mapping_configuration_id': job.mapping_configuration_id,
+        'mapping_configuration_name': job.mapping_configuration.name,
+        'status': job.status,
+        'total_records': job.total_records,
+        'processed_records': job.processed_records,
+        'failed_records': job.failed_records,
+        'progress_percentage': job.progress_percentage,
+        'start_time': job.start_time,
+        'end_time': job.end_time,
+        'error_message': job.error_message,
+        'created_at': job.created_at,
+        'is_incremental': job.is_incremental
+    }
+
+# List endpoints eager-load every relationship they serialize and add
+# raiseload('*') so any other relationship access raises instead of
+# silently issuing one lazy SELECT per row.
+
 @migration_bp.route('/jobs', methods=['GET'])
 def get_jobs():
     """Get all migration jobs"""
     try:
-        jobs = MigrationJob.query.order_by(MigrationJob.created_at.desc()).all()
-
-        return jsonify([
-            {
-                'id': job.id,
-                'mapping_configuration_name': job.mapping_configuration.name,
-                'status': job.status,
-                'total_records': job.total_records,
-                'processed_records': job.processed_records,
-                'failed_records': job.failed_records,
-                'progress_percentage': job.progress_percentage,
-                'start_time': job.start_time.isoformat() if job.start_time else None,
-                'end_time': job.end_time.isoformat() if job.end_time else None,
-                'error_message': job.error_message,
-                'created_at': job.created_at.isoformat(),
-                'is_incremental': job.is_incremental,
-            }
-            for job in jobs
-        ])
-
-        return jsonify([{
-            'id': job.id,
-            'mapping_configuration_name': job.mapping_configuration.name,
-            'status': job.status,
-            'total_records': job.total_records,
-            'processed_records': job.processed_records,
-            'failed_records': job.failed_records,
-            'progress_percentage': job.progress_percentage,
-            'start_time': job.start_time.isoformat() if job.start_time else None,
-            'end_time': job.end_time.isoformat() if job.end_time else None,
-            'error_message': job.error_message,
-
-            'created_at': job.created_at.isoformat(),
-            'is_incremental': job.is_incremental
-
-        } for job in jobs])
-
-
+        jobs = MigrationJob.query.options(
+            joinedload(MigrationJob.mapping_configuration),
+            raiseload('*')
+        ).order_by(MigrationJob.created_at.desc()).all()
 
+        return json_response([_serialize_job(job) for job in jobs])
     except Exception as e:
         logger.error(f"Error fetching migration jobs: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -61,37 +56,19 @@ def create_job():
         data = request.json
         mapping_config_id = data['mapping_configuration_id']
 
-        mapping_config = MappingConfiguration.query.get_or_404(mapping_config_id)
-        is_incremental = data.get('is_incremental', bool(mapping_config.incremental_column))
-
-
-
-        mapping_config = MappingConfiguration.query.get_or_404(mapping_config_id)
-        is_incremental = data.get('is_incremental', bool(mapping_config.incremental_column))
-
-
-
-        mapping_config = MappingConfiguration.query.get_or_404(mapping_config_id)
-        is_incremental = data.get('is_incremental', bool(mapping_config.incremental_column))
+        MappingConfiguration.query.get_or_404(mapping_config_id)
         is_incremental = data.get('is_incremental', False)
 
-        mapping_config = MappingConfiguration.query.get_or_404(mapping_config_id)
-
-
         # Create new migration job
         job = MigrationJob(
             mapping_configuration_id=mapping_config_id,
             status='pending',
             is_incremental=is_incremental
-
-
-
         )
         db.session.add(job)
         db.session.commit()
         
         # Start migration in background
-        migration_service = MigrationService(app)
         migration_service.start_migration(job.id)
         
         return jsonify({'job_id': job.id, 'message': 'Migration job started successfully'})
@@ -104,32 +81,10 @@ def create_job():
 def get_job(job_id):
     """Get a specific migration job"""
     try:
-        job = MigrationJob.query.get_or_404(job_id)
-        return jsonify({
-            'id': job.id,
-            'mapping_configuration_id': job.mapping_configuration_id,
-            'mapping_configuration_name': job.mapping_configuration.name,
-            'status': job.status,
-            'total_records': job.total_records,
-            'processed_records': job.processed_records,
-            'failed_records': job.failed_records,
-            'progress_percentage': job.progress_percentage,
-            'start_time': job.start_time.isoformat() if job.start_time else None,
-            'end_time': job.end_time.isoformat() if job.end_time else None,
-            'error_message': job.error_message,
-            'created_at': job.created_at.isoformat(),
-            'is_incremental': job.is_incremental,
-
-
-            'created_at': job.created_at.isoformat(),
-            'is_incremental': job.is_incremental
-
-
-
-
-
-
-        })
+        job = MigrationJob.query.options(
+            joinedload(MigrationJob.mapping_configuration)
+        ).get_or_404(job_id)
+        return json_response(_serialize_job(job))
     except Exception as e:
         logger.error(f"Error fetching migration job: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -138,15 +93,12 @@ def get_job(job_id):
 def stop_job(job_id):
     """Stop a running migration job"""
     try:
-        job = MigrationJob.query.get_or_404(job_id)
+        MigrationJob.query.get_or_404(job_id)
         
-        if job.status != 'running':
+        if not migration_service.stop_migration(job_id):
             return jsonify({'error': 'Job is not running'}), 400
         
-        migration_service = MigrationService(app)
-        migration_service.stop_migration(job_id)
-        
-        return jsonify({'message': 'Migration job stopped'})
+        return jsonify({'message': 'Migration job stopping'})
     except Exception as e:
         logger.error(f"Error stopping migration job: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -155,30 +107,34 @@ def stop_job(job_id):
 def retry_job(job_id):
     """Retry a failed migration job"""
     try:
-        job = MigrationJob.query.get_or_404(job_id)
-
-        if job.status != 'failed':
+        MigrationJob.query.get_or_404(job_id)
+
+        # Reset job status; conditional on 'failed' so concurrent retries
+        # from different workers cannot both restart the job
+        reset = MigrationJob.query.filter_by(id=job_id, status='failed').update({
+            'status': 'pending',
+            'processed_records': 0,
+            'failed_records': 0,
+            'start_time': None,
+            'end_time': None,
+            'error_message': None
+        }, synchronize_session=False)
+        if not reset:
             return jsonify({'error': 'Job has not failed'}), 400
 
-        # Reset job status
-        job.status = 'pending'
-        job.processed_records = 0
-        job.failed_records = 0
-        job.start_time = None
-        job.end_time = None
-        job.error_message = None
-
         # Reset non-completed batches
-        for batch in job.batches:
-            if batch.status != 'completed':
-                batch.status = 'pending'
-                batch.processed_records = 0
-                batch.error_message = None
+        MigrationBatch.query.filter(
+            MigrationBatch.job_id == job_id,
+            MigrationBatch.status != 'completed'
+        ).update({
+            'status': 'pending',
+            'processed_records': 0,
+            'error_message': None
+        }, synchronize_session=False)
 
         db.session.commit()
 
         # Restart migration
-        migration_service = MigrationService(app)
         migration_service.start_migration(job_id)
 
         return jsonify({'message': 'Migration job restarted'})
@@ -193,10 +149,21 @@ def retry_job(job_id):
 def clear_completed_jobs():
     """Delete all completed migration jobs"""
     try:
-        completed_jobs = MigrationJob.query.filter_by(status='completed').all()
-        count = len(completed_jobs)
-        for job in completed_jobs:
-            db.session.delete(job)
+        # Resolve the ids once so both DELETEs act on the same jobs even if
+        # another job completes in between
+        completed_ids = db.session.scalars(
+            select(MigrationJob.id).where(MigrationJob.status == 'completed')
+        ).all()
+        if not completed_ids:
+            return jsonify({'deleted': 0})
+
+        # Bulk DELETEs bypass the ORM cascade, so remove batches first
+        MigrationBatch.query.filter(
+            MigrationBatch.job_id.in_(completed_ids)
+        ).delete(synchronize_session=False)
+        count = MigrationJob.query.filter(
+            MigrationJob.id.in_(completed_ids)
+        ).delete(synchronize_session=False)
         db.session.commit()
         return jsonify({'deleted': count})
     except Exception as e:
@@ -211,8 +178,11 @@ def clear_completed_jobs():
 def get_job_batches(job_id):
     """Get batch details for a migration job"""
     try:
-        job = MigrationJob.query.get_or_404(job_id)
-        return jsonify([
+        job = MigrationJob.query.options(
+            joinedload(MigrationJob.batches),
+            raiseload('*')
+        ).get_or_404(job_id)
+        return json_response([
             {
                 'id': batch.id,
                 'offset': batch.offset,
@@ -237,7 +207,6 @@ def preview_migration():
         
         mapping_config = MappingConfiguration.query.get_or_404(mapping_config_id)
         
-        migration_service = MigrationService(app)
         preview_data = migration_service.preview_migration(mapping_config, limit)
         
         return jsonify(preview_data)
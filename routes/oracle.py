@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import OracleConnection
 from services.oracle_service import OracleService
-from app import db
+from app import db, json_response, invalidate_dashboard_count, ORACLE_COUNT_KEY
 import logging
 
 oracle_bp = Blueprint('oracle', __name__)
@@ -12,14 +12,14 @@ def get_connections():
     """Get all Oracle connections"""
     try:
         connections = OracleConnection.query.filter_by(is_active=True).all()
-        return jsonify([{
+        return json_response([{
             'id': conn.id,
             'name': conn.name,
             'host': conn.host,
             'port': conn.port,
             'service_name': conn.service_name,
             'username': conn.username,
-            'created_at': conn.created_at.isoformat()
+            'created_at': conn.created_at
         } for conn in connections])
     except Exception as e:
         logger.error(f"Error fetching Oracle connections: {str(e)}")
@@ -40,6 +40,7 @@ def create_connection():
         )
         db.session.add(connection)
         db.session.commit()
+        invalidate_dashboard_count(ORACLE_COUNT_KEY)
         
         return jsonify({'id': connection.id, 'message': 'Connection created successfully'})
     except Exception as e:
@@ -54,7 +55,12 @@ def test_connection(connection_id):
         connection = OracleConnection.query.get_or_404(connection_id)
         oracle_service = OracleService(connection)
         
-        if oracle_service.test_connection():
+        try:
+            connected = oracle_service.test_connection()
+        finally:
+            oracle_service.close_connection()
+        
+        if connected:
             return jsonify({'success': True, 'message': 'Connection successful'})
         else:
             return jsonify({'success': False, 'message': 'Connection failed'}), 400
@@ -69,7 +75,10 @@ def get_tables(connection_id):
         connection = OracleConnection.query.get_or_404(connection_id)
         oracle_service = OracleService(connection)
         
-        tables = oracle_service.get_tables()
+        try:
+            tables = oracle_service.get_tables()
+        finally:
+            oracle_service.close_connection()
         return jsonify(tables)
     except Exception as e:
         logger.error(f"Error fetching Oracle tables: {str(e)}")
@@ -82,7 +91,10 @@ def get_table_columns(connection_id, table_name):
         connection = OracleConnection.query.get_or_404(connection_id)
         oracle_service = OracleService(connection)
         
-        columns = oracle_service.get_table_columns(table_name)
+        try:
+            columns = oracle_service.get_table_columns(table_name)
+        finally:
+            oracle_service.close_connection()
         return jsonify(columns)
     except Exception as e:
         logger.error(f"Error fetching table columns: {str(e)}")
@@ -99,7 +111,10 @@ def analyze_query(connection_id):
         if not query:
             return jsonify({'error': 'Query is required'}), 400
         
-        analysis = oracle_service.analyze_query(query)
+        try:
+            analysis = oracle_service.analyze_query(query)
+        finally:
+            oracle_service.close_connection()
         return jsonify(analysis)
     except Exception as e:
         logger.error(f"Error analyzing query: {str(e)}")
@@ -114,12 +129,19 @@ def execute_query(connection_id):
         
         data = request.json
         query = data.get('query')
-        limit = data.get('limit', 10)
         
         if not query:
             return jsonify({'error': 'Query is required'}), 400
         
-        results = oracle_service.execute_query(query, limit)
+        try:
+            limit = int(data.get('limit', 10))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Limit must be an integer'}), 400
+        
+        try:
+            results = oracle_service.execute_query(query, limit)
+        finally:
+            oracle_service.close_connection()
         return jsonify(results)
     except Exception as e:
         logger.error(f"Error executing query: {str(e)}")
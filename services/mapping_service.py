@@ -9,6 +9,10 @@ class MappingService:
         self.oracle_service = OracleService(oracle_connection)
         self.elasticsearch_service = ElasticsearchService(elasticsearch_connection)
     
+    def close(self):
+        """Return the Oracle connection to its pool"""
+        self.oracle_service.close_connection()
+    
     def generate_auto_mapping(self, oracle_query, elasticsearch_index):
         """Generate automatic field mapping suggestions"""
         try:
@@ -10,31 +10,30 @@ from app import db
 logger = logging.getLogger(__name__)
 
 class MigrationService:
+    # Running and stop state lives on the MigrationJob row rather than in
+    # this object, so any worker process can stop a job another one runs.
     def __init__(self, app):
         self.app = app
-        self.running_jobs = {}
-        self.stop_flags = {}
     
     def start_migration(self, job_id):
         """Start migration job in background thread"""
-        if job_id in self.running_jobs:
-            logger.warning(f"Migration job {job_id} is already running")
-            return
-        
-        self.stop_flags[job_id] = False
         thread = threading.Thread(target=self._execute_migration, args=(job_id,))
         thread.daemon = True
         thread.start()
-        self.running_jobs[job_id] = thread
     
     def stop_migration(self, job_id):
-        """Stop running migration job"""
-        if job_id in self.stop_flags:
-            self.stop_flags[job_id] = True
+        """Ask a running migration job to stop; returns False if it was not running"""
+        stopped = MigrationJob.query.filter_by(id=job_id, status='running').update(
+            {'status': 'stopping'}, synchronize_session=False
+        )
+        db.session.commit()
+        if stopped:
             logger.info(f"Stop signal sent for migration job {job_id}")
+        return bool(stopped)
     
     def _execute_migration(self, job_id):
         """Execute the actual data migration"""
+        oracle_service = None
         try:
             with self.app.app_context():
                 # Get job and mapping configuration
@@ -48,10 +47,15 @@ class MigrationService:
                 if job.is_incremental:
                     oracle_query = self._apply_incremental_filter(oracle_query, mapping_config)
 
-                # Update job status
-                job.status = 'running'
-                job.start_time = datetime.utcnow()
+                # Claim the job; only one thread in any process may run it
+                claimed = MigrationJob.query.filter_by(id=job_id, status='pending').update(
+                    {'status': 'running', 'start_time': datetime.utcnow()},
+                    synchronize_session=False
+                )
                 db.session.commit()
+                if not claimed:
+                    logger.warning(f"Migration job {job_id} is already running")
+                    return
                 
                 logger.info(f"Starting migration job {job_id}")
                 
@@ -92,8 +96,9 @@ class MigrationService:
                 ).order_by(MigrationBatch.offset).all()
 
                 for batch in batches:
-                    # Check stop flag
-                    if self.stop_flags.get(job_id, False):
+                    # Check for a stop request from any worker
+                    db.session.refresh(job)
+                    if job.status == 'stopping':
                         job.status = 'stopped'
                         job.end_time = datetime.utcnow()
                         db.session.commit()
@@ -119,19 +124,6 @@ class MigrationService:
 
                     transformed_data = self._transform_batch(batch_data, mapping_config)
 
-
-                            batch.offset,
-                            batch.limit,
-                        )
-                    except Exception as e:
-                        batch.status = 'failed'
-                        batch.error_message = str(e)
-                        failed += batch.limit
-                        db.session.commit()
-                        continue
-
-
-
                     try:
 
                         result = es_service.bulk_index(
@@ -201,10 +193,8 @@ class MigrationService:
         
         finally:
             # Clean up
-            if job_id in self.running_jobs:
-                del self.running_jobs[job_id]
-            if job_id in self.stop_flags:
-                del self.stop_flags[job_id]
+            if oracle_service:
+                oracle_service.close_connection()
 
     def _apply_incremental_filter(self, query, mapping_config):
         """Apply incremental sync filter to query if configured"""
@@ -251,8 +241,8 @@ class MigrationService:
     
     def _transform_batch(self, batch_data, mapping_config):
         """Transform batch data according to field mappings"""
-        field_mappings = mapping_config.get_field_mappings()
-        transformation_rules = mapping_config.get_transformation_rules()
+        field_mappings = mapping_config.field_mappings or []
+        transformation_rules = mapping_config.transformation_rules or []
         
         transformed_batch = []
         
@@ -325,7 +315,10 @@ class MigrationService:
                 query = self._apply_incremental_filter(query, mapping_config)
 
             # Get sample data
-            sample_data = oracle_service.execute_query(query, limit)
+            try:
+                sample_data = oracle_service.execute_query(query, limit)
+            finally:
+                oracle_service.close_connection()
             
             # Transform sample data
             transformed_data = self._transform_batch(sample_data['rows'], mapping_config)
@@ -333,8 +326,8 @@ class MigrationService:
             return {
                 'original_data': sample_data['rows'],
                 'transformed_data': transformed_data,
-                'field_mappings': mapping_config.get_field_mappings(),
-                'transformation_rules': mapping_config.get_transformation_rules()
+                'field_mappings': mapping_config.field_mappings or [],
+                'transformation_rules': mapping_config.transformation_rules or []
             }
             
         except Exception as e:
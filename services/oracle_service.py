@@ -1,34 +1,146 @@
+import functools
+import hashlib
+import json
+import re
+import threading
 import oracledb
+import redis
 import logging
-import sqlparse
-from sqlparse.sql import IdentifierList, Identifier
-from sqlparse.tokens import Keyword, DML
+from app import redis_client
 
 logger = logging.getLogger(__name__)
 
+# Connection pools shared by all service instances, keyed by connection
+# id and a hash of the credentials they were created with
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+# Milliseconds acquire() waits for a free pooled connection before failing
+_POOL_WAIT_TIMEOUT_MS = 10000
+
+# ORA- codes meaning the pool's credentials will never work: invalid
+# username/password, account locked, password expired
+_AUTH_ERROR_CODES = {1017, 28000, 28001}
+
+# Seconds to cache metadata lookups (tables, columns, query analysis)
+_METADATA_CACHE_TTL = 300
+
+# Fetch size for data dictionary queries, which can return many rows
+_METADATA_ARRAYSIZE = 1000
+
+# Oracle data type -> Elasticsearch field type
+_ORACLE_TO_ES_TYPES = {
+    'NUMBER': 'long',
+    'FLOAT': 'float',
+    'BINARY_FLOAT': 'float',
+    'BINARY_DOUBLE': 'double',
+    'VARCHAR2': 'text',
+    'CHAR': 'keyword',
+    'NVARCHAR2': 'text',
+    'NCHAR': 'keyword',
+    'CLOB': 'text',
+    'NCLOB': 'text',
+    'DATE': 'date',
+    'TIMESTAMP': 'date',
+    'TIMESTAMP WITH TIME ZONE': 'date',
+    'TIMESTAMP WITH LOCAL TIME ZONE': 'date',
+    'BLOB': 'binary',
+    'RAW': 'binary',
+    'LONG RAW': 'binary'
+}
+
+_JOIN_RE = re.compile(r'\bjoin\b', re.IGNORECASE)
+
+# Queries that already limit their own rows are executed as written
+_ROW_LIMIT_RE = re.compile(r'\b(rownum|fetch\s+(first|next)|limit)\b', re.IGNORECASE)
+
+# oracledb type code -> Oracle type name
+_ORACLE_TYPE_NAMES = {
+    oracledb.DB_TYPE_VARCHAR: 'VARCHAR2',
+    oracledb.DB_TYPE_CHAR: 'CHAR',
+    oracledb.DB_TYPE_NUMBER: 'NUMBER',
+    oracledb.DB_TYPE_DATE: 'DATE',
+    oracledb.DB_TYPE_TIMESTAMP: 'TIMESTAMP',
+    oracledb.DB_TYPE_CLOB: 'CLOB',
+    oracledb.DB_TYPE_BLOB: 'BLOB',
+    oracledb.DB_TYPE_BINARY_FLOAT: 'BINARY_FLOAT',
+    oracledb.DB_TYPE_BINARY_DOUBLE: 'BINARY_DOUBLE'
+}
+
+def _to_json_value(value):
+    """Convert an Oracle column value to a JSON-serializable type"""
+    if hasattr(value, 'isoformat'):  # Date/Datetime
+        return value.isoformat()
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return str(value)
+
 class OracleService:
     def __init__(self, connection_config):
         self.config = connection_config
         self.connection = None
+        self.pool = None
     
     def get_connection(self):
-        """Get Oracle database connection"""
+        """Get Oracle database connection from the shared pool"""
         if not self.connection:
             try:
+                self.pool = self._get_pool()
+                self.connection = self.pool.acquire()
+            except Exception as e:
+                logger.error(f"Failed to connect to Oracle: {str(e)}")
+                error = e.args[0] if e.args else None
+                if self.pool and getattr(error, 'code', None) in _AUTH_ERROR_CODES:
+                    self._discard_pool(self.pool)
+                raise
+        return self.connection
+    
+    def _pool_key(self):
+        """Pool key: connection id plus a hash of its credentials"""
+        credentials = '\0'.join(str(part) for part in (
+            self.config.host,
+            self.config.port,
+            self.config.service_name,
+            self.config.username,
+            self.config.password
+        ))
+        return (self.config.id, hashlib.sha256(credentials.encode('utf-8')).hexdigest())
+    
+    def _get_pool(self):
+        """Get or create the connection pool for this connection config"""
+        key = self._pool_key()
+        with _POOLS_LOCK:
+            pool = _POOLS.get(key)
+            if pool is None:
                 dsn = oracledb.makedsn(
                     self.config.host, 
                     self.config.port, 
                     service_name=self.config.service_name
                 )
-                self.connection = oracledb.connect(
+                pool = oracledb.create_pool(
                     user=self.config.username,
                     password=self.config.password,
-                    dsn=dsn
+                    dsn=dsn,
+                    min=2,
+                    max=10,
+                    increment=1,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=_POOL_WAIT_TIMEOUT_MS
                 )
-            except Exception as e:
-                logger.error(f"Failed to connect to Oracle: {str(e)}")
-                raise
-        return self.connection
+                _POOLS[key] = pool
+        return pool
+    
+    def _discard_pool(self, pool):
+        """Drop a pool whose credentials were rejected so the next call starts fresh"""
+        with _POOLS_LOCK:
+            key = self._pool_key()
+            if _POOLS.get(key) is pool:
+                del _POOLS[key]
+        try:
+            pool.close(force=True)
+        except Exception as e:
+            logger.warning(f"Error closing rejected Oracle pool: {str(e)}")
+        self.pool = None
     
     def test_connection(self):
         """Test Oracle database connection"""
@@ -45,10 +157,18 @@ class OracleService:
     
     def get_tables(self):
         """Get all tables from Oracle database"""
+        cache_key = f"oracle:{self.config.id}:tables"
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
+            cursor.arraysize = _METADATA_ARRAYSIZE
+            cursor.prefetchrows = _METADATA_ARRAYSIZE + 1
+            
             cursor.execute("""
                 SELECT table_name, num_rows, last_analyzed
                 FROM user_tables 
@@ -64,6 +184,7 @@ class OracleService:
                 })
             
             cursor.close()
+            self._cache_set(cache_key, tables)
             return tables
         except Exception as e:
             logger.error(f"Error fetching tables: {str(e)}")
@@ -71,10 +192,18 @@ class OracleService:
     
     def get_table_columns(self, table_name):
         """Get columns for a specific table"""
+        cache_key = f"oracle:{self.config.id}:cols:{table_name.upper()}"
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
+            cursor.arraysize = _METADATA_ARRAYSIZE
+            cursor.prefetchrows = _METADATA_ARRAYSIZE + 1
+            
             cursor.execute("""
                 SELECT column_name, data_type, data_length, data_precision, 
                        data_scale, nullable, data_default
@@ -97,6 +226,7 @@ class OracleService:
                 })
             
             cursor.close()
+            self._cache_set(cache_key, columns)
             return columns
         except Exception as e:
             logger.error(f"Error fetching table columns: {str(e)}")
@@ -104,6 +234,12 @@ class OracleService:
     
     def analyze_query(self, query):
         """Analyze SQL query and extract column information"""
+        query_hash = hashlib.sha1(query.encode('utf-8')).hexdigest()
+        cache_key = f"oracle:{self.config.id}:analyze:{query_hash}"
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
@@ -121,7 +257,7 @@ class OracleService:
                     'field': column_name.lower(),
                     'oracle_type': oracle_type,
                     'elasticsearch_type': self._map_oracle_to_es_type(oracle_type),
-                    'source': self._extract_source_from_query(query, column_name)
+                    'source': self._extract_source_from_query(column_name)
                 })
             
             cursor.close()
@@ -129,11 +265,13 @@ class OracleService:
             # Parse query for additional information
             joins = self._extract_joins_from_query(query)
             
-            return {
+            analysis = {
                 'columns': columns,
                 'joins': joins,
                 'query_type': 'SELECT'
             }
+            self._cache_set(cache_key, analysis)
+            return analysis
         except Exception as e:
             logger.error(f"Error analyzing query: {str(e)}")
             raise
@@ -141,34 +279,33 @@ class OracleService:
     def execute_query(self, query, limit=10):
         """Execute SQL query and return sample results"""
         try:
+            limit = max(int(limit), 1)
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Add ROWNUM limit if not present
-            if 'ROWNUM' not in query.upper() and 'LIMIT' not in query.upper():
-                limited_query = f"SELECT * FROM ({query}) WHERE ROWNUM <= {limit}"
-            else:
-                limited_query = query
+            # Size the prefetch so all `limit` rows arrive with the execute call
+            cursor.arraysize = limit
+            cursor.prefetchrows = limit + 1
             
-            cursor.execute(limited_query)
+            # Add a ROWNUM limit if not present, so Oracle can stop early
+            # (COUNT STOPKEY / top-N sort) instead of producing every row
+            if _ROW_LIMIT_RE.search(query):
+                cursor.execute(query)
+            else:
+                cursor.execute(
+                    f"SELECT * FROM ({query}) WHERE ROWNUM <= :row_limit",
+                    {'row_limit': limit}
+                )
             
             # Get column names
             column_names = [desc[0] for desc in cursor.description]
             
             # Fetch results
-            rows = cursor.fetchall()
-            results = []
-            for row in rows:
-                row_dict = {}
-                for i, value in enumerate(row):
-                    # Convert Oracle types to JSON-serializable types
-                    if hasattr(value, 'isoformat'):  # Date/Datetime
-                        row_dict[column_names[i]] = value.isoformat()
-                    elif isinstance(value, (int, float, str)) or value is None:
-                        row_dict[column_names[i]] = value
-                    else:
-                        row_dict[column_names[i]] = str(value)
-                results.append(row_dict)
+            rows = cursor.fetchmany(limit)
+            results = [
+                dict(zip(column_names, map(_to_json_value, row)))
+                for row in rows
+            ]
             
             cursor.close()
             
@@ -181,80 +318,58 @@ class OracleService:
             logger.error(f"Error executing query: {str(e)}")
             raise
     
-    def _map_oracle_to_es_type(self, oracle_type):
+    def _cache_get(self, key):
+        """Read a cached metadata result, or None on a miss"""
+        try:
+            cached = redis_client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Redis unavailable, skipping cache read: {str(e)}")
+            return None
+        return json.loads(cached) if cached is not None else None
+    
+    def _cache_set(self, key, value):
+        """Cache a metadata result for _METADATA_CACHE_TTL seconds"""
+        try:
+            redis_client.setex(key, _METADATA_CACHE_TTL, json.dumps(value))
+        except redis.RedisError as e:
+            logger.warning(f"Redis unavailable, skipping cache write: {str(e)}")
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _map_oracle_to_es_type(oracle_type):
         """Map Oracle data types to Elasticsearch types"""
-        type_mapping = {
-            'NUMBER': 'long',
-            'FLOAT': 'float',
-            'BINARY_FLOAT': 'float',
-            'BINARY_DOUBLE': 'double',
-            'VARCHAR2': 'text',
-            'CHAR': 'keyword',
-            'NVARCHAR2': 'text',
-            'NCHAR': 'keyword',
-            'CLOB': 'text',
-            'NCLOB': 'text',
-            'DATE': 'date',
-            'TIMESTAMP': 'date',
-            'TIMESTAMP WITH TIME ZONE': 'date',
-            'TIMESTAMP WITH LOCAL TIME ZONE': 'date',
-            'BLOB': 'binary',
-            'RAW': 'binary',
-            'LONG RAW': 'binary'
-        }
-        
-        # Handle NUMBER with precision/scale
-        if oracle_type.startswith('NUMBER'):
-            if ',' in oracle_type:  # Has decimal places
-                return 'double'
-            else:
-                return 'long'
+        # Look up by base type, e.g. NUMBER(10,2) -> NUMBER
+        base_type = oracle_type.split('(', 1)[0]
+        if base_type == 'NUMBER' and ',' in oracle_type:  # Has decimal places
+            return 'double'
         
-        return type_mapping.get(oracle_type, 'keyword')
+        return _ORACLE_TO_ES_TYPES.get(base_type, 'keyword')
     
-    def _get_oracle_type_name(self, type_code):
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _get_oracle_type_name(type_code):
         """Convert Oracle type code to type name"""
-        type_codes = {
-            oracledb.DB_TYPE_VARCHAR: 'VARCHAR2',
-            oracledb.DB_TYPE_CHAR: 'CHAR',
-            oracledb.DB_TYPE_NUMBER: 'NUMBER',
-            oracledb.DB_TYPE_DATE: 'DATE',
-            oracledb.DB_TYPE_TIMESTAMP: 'TIMESTAMP',
-            oracledb.DB_TYPE_CLOB: 'CLOB',
-            oracledb.DB_TYPE_BLOB: 'BLOB',
-            oracledb.DB_TYPE_BINARY_FLOAT: 'BINARY_FLOAT',
-            oracledb.DB_TYPE_BINARY_DOUBLE: 'BINARY_DOUBLE'
-        }
-        return type_codes.get(type_code, 'UNKNOWN')
+        return _ORACLE_TYPE_NAMES.get(type_code, 'UNKNOWN')
     
-    def _extract_source_from_query(self, query, column_name):
+    def _extract_source_from_query(self, column_name):
         """Extract source table and column from query"""
         # This is a simplified implementation
         # In a production system, you would want a more sophisticated SQL parser
-        try:
-            parsed = sqlparse.parse(query)[0]
-            # Basic extraction - would need more sophisticated parsing for complex queries
-            return f"query.{column_name}"
-        except:
-            return f"query.{column_name}"
+        return f"query.{column_name}"
     
     def _extract_joins_from_query(self, query):
         """Extract JOIN information from query"""
         joins = []
-        try:
-            # Simple regex-based extraction for demonstration
-            # In production, use a proper SQL parser
-            query_upper = query.upper()
-            if 'JOIN' in query_upper:
-                # This is a simplified extraction
-                # Would need more sophisticated parsing for production
-                joins.append({'type': 'INNER', 'condition': 'Detected in query'})
-        except:
-            pass
+        # Simple regex-based extraction for demonstration
+        # In production, use a proper SQL parser
+        if _JOIN_RE.search(query):
+            # This is a simplified extraction
+            # Would need more sophisticated parsing for production
+            joins.append({'type': 'INNER', 'condition': 'Detected in query'})
         return joins
     
     def close_connection(self):
-        """Close Oracle connection"""
+        """Return Oracle connection to the pool"""
         if self.connection:
-            self.connection.close()
+            self.pool.release(self.connection)
             self.connection = None
@@ -133,6 +133,7 @@ function getStatusBadge(status) {
     const badges = {
         'pending': 'bg-warning',
         'running': 'bg-primary',
+        'stopping': 'bg-warning',
         'completed': 'bg-success',
         'failed': 'bg-danger',
         'stopped': 'bg-secondary'